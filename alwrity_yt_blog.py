@@ -4,13 +4,24 @@ import requests
 import streamlit as st
 from pytubefix import YouTube  # Changed from pytube to pytubefix
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 from dotenv import load_dotenv
 import re
 import base64
+import json
+import logging
+import hashlib
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Load environment variables from .env file (as fallback)
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 def _get_secret_or_env(var_name: str) -> str:
     """Return value from Streamlit secrets if present, else environment, else empty."""
     try:
@@ -20,15 +31,156 @@ def _get_secret_or_env(var_name: str) -> str:
         pass
     return os.getenv(var_name, '')
 
-def validate_api_keys(assemblyai_key: str, gemini_key: str):
+def validate_api_keys(assemblyai_keys: list, gemini_keys: list):
     """Validate that required API keys are present based on provided or env/secrets."""
     missing_keys = []
-    if not assemblyai_key:
+    if not assemblyai_keys:
         missing_keys.append("ASSEMBLYAI_API_KEY")
-    if not gemini_key:
+    if not gemini_keys:
         missing_keys.append("GEMINI_API_KEY")
     return missing_keys
 
+# API key pools. Several keys per provider can be configured; jobs are spread
+# across them and keys that get rejected or rate limited are benched for a while.
+KEY_COOLDOWN_UNAUTHORIZED = 15 * 60  # Seconds to bench a key after 401/403
+KEY_COOLDOWN_RATE_LIMITED = 60  # Seconds to bench a key after 429 without Retry-After
+
+def parse_api_keys(value) -> list:
+    """Parse a comma- or newline-separated key list into (key, weight) pairs.
+
+    A key may carry a weight as `key:weight` to receive proportionally more jobs.
+    Lists (e.g. a TOML array in Streamlit secrets) are accepted too.
+    """
+    if isinstance(value, (list, tuple)):
+        keys = {}
+        for item in value:
+            keys.update(parse_api_keys(item if isinstance(item, (list, tuple)) else str(item)))
+        return list(keys.items())
+    keys = {}
+    for item in re.split(r'[,\n]', value or ''):
+        key, _, weight = item.strip().partition(':')
+        if not key.strip():
+            continue
+        try:
+            weight = float(weight) if weight else 1.0
+        except ValueError:
+            weight = 1.0
+        keys[key.strip()] = max(weight, 0.1)
+    return list(keys.items())
+
+def resolve_api_keys(user_input: str, var_name: str) -> list:
+    """Return (key, weight) pairs from user input, else from secrets/env `VAR` and `VARS`."""
+    if user_input:
+        return parse_api_keys(user_input)
+    return parse_api_keys([_get_secret_or_env(var_name), _get_secret_or_env(f"{var_name}S")])
+
+KEY_STATE_IDLE_TTL = 24 * 60 * 60  # Forget state of keys unused for a day
+
+@st.cache_resource
+def _api_key_registry():
+    """Return the process-wide state of every API key, keyed by provider and key fingerprint.
+
+    State lives here rather than in a pool, so a key listed in several pools
+    (e.g. in .env and in a sidebar list) shares one in-flight count and cooldown.
+    """
+    return {"lock": threading.Lock(), "keys": {}}
+
+class ApiKeyPool:
+    """Spread requests for one provider across several API keys.
+
+    Keys are handed out least-loaded first (in-flight requests divided by weight,
+    then fewest errors). A key that answers 401/403 or 429 is skipped until its
+    cooldown expires. Pools are cheap views: per-key state is shared process-wide
+    through _api_key_registry.
+    """
+
+    def __init__(self, provider: str, keys: list):
+        self.provider = provider
+        self.keys = [key for key, _ in keys]
+        self._weights = dict(keys)
+        self._registry = _api_key_registry()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _state(self, key):
+        """Return the shared state of key; call with the registry lock held."""
+        registry_key = (self.provider, _key_fingerprint(key))
+        state = self._registry["keys"].get(registry_key)
+        if state is None:
+            state = {"in_flight": 0, "errors": 0, "cooldown_until": 0.0, "last_used": 0.0}
+            self._registry["keys"][registry_key] = state
+        return state
+
+    def _prune_idle_states(self, now):
+        """Drop state of keys that are idle, not benched and unused for a while; call with the lock held."""
+        states = self._registry["keys"]
+        for registry_key, state in list(states.items()):
+            if (state["in_flight"] == 0 and state["cooldown_until"] <= now
+                    and now - state["last_used"] > KEY_STATE_IDLE_TTL):
+                del states[registry_key]
+
+    def acquire(self, prefer=()):
+        """Return the least-loaded available key and count it as in flight, or None if all are benched.
+
+        A key in prefer is returned whenever it is available, regardless of load.
+        """
+        now = time.time()
+        with self._registry["lock"]:
+            self._prune_idle_states(now)
+            available = [(key, self._state(key)) for key in self.keys if self._state(key)["cooldown_until"] <= now]
+            if not available:
+                return None
+            preferred = [item for item in available if item[0] in prefer]
+            key, state = min(
+                preferred or available,
+                key=lambda item: (item[1]["in_flight"] / self._weights[item[0]], item[1]["errors"], item[1]["last_used"])
+            )
+            state["in_flight"] += 1
+            state["last_used"] = now
+            return key
+
+    def release(self, key):
+        """Mark a request made with key as finished."""
+        with self._registry["lock"]:
+            self._state(key)["in_flight"] -= 1
+
+    @contextmanager
+    def lease(self, prefer=()):
+        """Acquire a key for the duration of a with block (yields None if all keys are benched)."""
+        key = self.acquire(prefer)
+        try:
+            yield key
+        finally:
+            if key:
+                self.release(key)
+
+    def report_failure(self, key, status_code=None, retry_after=None):
+        """Count an error for key and bench it if the provider rejected or rate limited it."""
+        with self._registry["lock"]:
+            state = self._state(key)
+            state["errors"] += 1
+            if status_code in (401, 403):
+                cooldown = KEY_COOLDOWN_UNAUTHORIZED
+            elif status_code == 429:
+                cooldown = retry_after or KEY_COOLDOWN_RATE_LIMITED
+            else:
+                return
+            state["cooldown_until"] = max(state["cooldown_until"], time.time() + cooldown)
+
+    def seconds_until_available(self) -> int:
+        """Return how long until at least one key is usable again (0 if one is usable now)."""
+        now = time.time()
+        with self._registry["lock"]:
+            return max(0, int(min(self._state(key)["cooldown_until"] for key in self.keys) - now))
+
+def _report_key_response(key_pool, api_key, response):
+    """Report an auth or rate-limit HTTP response to the key pool, if there is one."""
+    if key_pool is None or response.status_code not in (401, 403, 429):
+        return
+    retry_after = response.headers.get("Retry-After", "")
+    key_pool.report_failure(api_key, response.status_code, int(retry_after) if retry_after.isdigit() else None)
+
 def extract_video_id(url):
     """Extract YouTube video ID from various URL formats"""
     # Regular expressions to match different YouTube URL formats
@@ -41,8 +193,526 @@ def extract_video_id(url):
         return youtube_match.group(6)
     return None
 
-def get_youtube_transcript(yt_url, assemblyai_api_key: str):
-    """Extract transcript from YouTube video using AssemblyAI"""
+# Parallel ranged download settings. YouTube throttles each connection, so a
+# stream is split into byte ranges that are fetched concurrently.
+RANGED_DOWNLOAD_CHUNK_SIZE = 2 * 1024 * 1024  # 2MB per range
+RANGED_DOWNLOAD_WORKERS = 6
+RANGED_DOWNLOAD_RETRIES = 4
+
+def _fetch_byte_range(url, start, end, dest_path, filesize, max_retries=RANGED_DOWNLOAD_RETRIES):
+    """Fetch bytes start..end (inclusive) of url into dest_path at the same offset.
+
+    A failed attempt resumes from the last byte written instead of refetching the whole range.
+    A 200 response means the server ignored the range and sends the stream from byte 0, so it
+    is only accepted when the request covers the whole stream.
+    """
+    offset = start
+    last_error = None
+    for attempt in range(max_retries + 1):
+        try:
+            # googlevideo URLs take the range as a query parameter (as pytubefix does)
+            with requests.get(f"{url}&range={offset}-{end}", stream=True, timeout=(10, 30)) as response:
+                if response.status_code == 200 and not (offset == 0 and end + 1 == filesize):
+                    raise IOError(f"Server ignored range {offset}-{end} and returned the whole stream")
+                if response.status_code not in (200, 206):
+                    raise IOError(f"HTTP {response.status_code} for range {offset}-{end}")
+                with open(dest_path, "r+b") as f:
+                    f.seek(offset)
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        if offset + len(chunk) > end + 1:
+                            raise IOError(f"Server returned more data than requested for range {start}-{end}")
+                        f.write(chunk)
+                        offset += len(chunk)
+            if offset == end + 1:
+                return
+            raise IOError(f"Incomplete range {start}-{end}: received up to byte {offset}")
+        except (requests.RequestException, IOError) as e:
+            last_error = e
+            if attempt < max_retries:
+                time.sleep(min(2 ** attempt, 8))
+    raise IOError(f"Range {start}-{end} failed after {max_retries + 1} attempts: {last_error}")
+
+def _discard_partial_download(dest_path):
+    """Remove a partially downloaded file and its range progress record."""
+    for path in (dest_path, f"{dest_path}.ranges"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def download_stream_ranged(url, filesize, dest_path, chunk_size=RANGED_DOWNLOAD_CHUNK_SIZE,
+                           max_workers=RANGED_DOWNLOAD_WORKERS, on_progress=None):
+    """Download a stream URL into dest_path using concurrent byte-range requests.
+
+    The file is preallocated to filesize and every range is written at its own offset.
+    Completed ranges are recorded in a `.ranges` file next to dest_path, so calling this
+    again after a failure only fetches the ranges that are still missing.
+    on_progress(done_bytes, filesize) is called from the calling thread.
+    """
+    if not url or not filesize:
+        raise IOError("Stream URL or size unavailable for ranged download.")
+
+    progress_path = f"{dest_path}.ranges"
+    ranges = [(start, min(start + chunk_size, filesize) - 1) for start in range(0, filesize, chunk_size)]
+
+    # Resume only if the preallocated file from an earlier attempt matches this stream
+    completed = set()
+    if os.path.exists(dest_path) and os.path.exists(progress_path) and os.path.getsize(dest_path) == filesize:
+        try:
+            with open(progress_path, "r") as f:
+                completed = set(json.load(f))
+        except (OSError, ValueError):
+            completed = set()
+    else:
+        with open(dest_path, "wb") as f:
+            f.truncate(filesize)
+
+    pending = [r for r in ranges if r[0] not in completed]
+    done_bytes = sum(end - start + 1 for start, end in ranges if start in completed)
+    if on_progress:
+        on_progress(done_bytes, filesize)
+
+    errors = []
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(_fetch_byte_range, url, start, end, dest_path, filesize): (start, end)
+                   for start, end in pending}
+        for future in as_completed(futures):
+            start, end = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            completed.add(start)
+            done_bytes += end - start + 1
+            with open(progress_path, "w") as f:
+                json.dump(sorted(completed), f)
+            if on_progress:
+                on_progress(done_bytes, filesize)
+    finally:
+        # Drop queued ranges if the job is stopped, but let running ones finish
+        # so nothing writes into the workspace after it is cleaned up
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if errors:
+        raise IOError(f"{len(errors)} of {len(ranges)} ranges failed; first error: {errors[0]}")
+
+    os.remove(progress_path)
+
+# Per-job workspaces. Every transcription job downloads into its own directory
+# under WORKSPACE_ROOT (point it at a tmpfs such as /dev/shm to keep audio in
+# memory), so concurrent sessions never share files. Each job reserves the size
+# of its download against a server-wide budget; the budget counts reserved
+# bytes, not bytes actually on disk, and a reservation is freed once the audio
+# leaves the workspace.
+WORKSPACE_ROOT = _get_secret_or_env('ALWRITY_WORKSPACE_ROOT') or os.path.join(tempfile.gettempdir(), 'alwrity_jobs')
+WORKSPACE_BUDGET_BYTES = int(_get_secret_or_env('ALWRITY_WORKSPACE_BUDGET_MB') or 2048) * 1024 * 1024
+
+@st.cache_resource
+def _workspace_registry():
+    """Return the process-wide map of active workspaces to their reserved bytes."""
+    return {"lock": threading.Lock(), "jobs": {}}
+
+@contextmanager
+def job_workspace():
+    """Create a unique workspace directory for one job and remove it when the job ends.
+
+    Cleanup runs on success, on errors, and when Streamlit stops the script run
+    (a rerun or closed session raises through the with block).
+    """
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    workspace = tempfile.mkdtemp(prefix="job_", dir=WORKSPACE_ROOT)
+    registry = _workspace_registry()
+    with registry["lock"]:
+        registry["jobs"][workspace] = 0
+    try:
+        yield workspace
+    finally:
+        with registry["lock"]:
+            registry["jobs"].pop(workspace, None)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def reserve_workspace_space(workspace, nbytes):
+    """Reserve nbytes of disk for a job; return False if that would exceed the server budget."""
+    registry = _workspace_registry()
+    with registry["lock"]:
+        in_use = sum(registry["jobs"].values())
+        if in_use + nbytes > WORKSPACE_BUDGET_BYTES:
+            return False
+        registry["jobs"][workspace] = registry["jobs"].get(workspace, 0) + nbytes
+        return True
+
+def release_workspace_space(workspace):
+    """Free a job's reservation once its files have left the workspace."""
+    registry = _workspace_registry()
+    with registry["lock"]:
+        if workspace in registry["jobs"]:
+            registry["jobs"][workspace] = 0
+
+# Local audio cache, so a failed upload or transcription can be retried without
+# going back to YouTube. Entries are keyed by video ID and stream itag and evicted
+# least-recently-used first once the cache exceeds its disk budget.
+AUDIO_CACHE_DIR = _get_secret_or_env('ALWRITY_AUDIO_CACHE_DIR') or os.path.join('.alwrity_cache', 'audio')
+AUDIO_CACHE_MAX_BYTES = int(_get_secret_or_env('ALWRITY_AUDIO_CACHE_MB') or 500) * 1024 * 1024
+UPLOAD_URL_TTL = 12 * 60 * 60  # Reuse AssemblyAI upload URLs for up to 12 hours
+
+def _key_fingerprint(api_key: str) -> str:
+    """Return a short, non-reversible fingerprint of an API key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def _audio_cache_entry_name(video_id, itag):
+    """Return the file stem shared by a cache entry's audio and metadata files."""
+    return f"{video_id}_{itag}"
+
+def _audio_cache_meta_path(video_id, itag):
+    """Return the metadata path of a cache entry."""
+    return os.path.join(AUDIO_CACHE_DIR, f"{_audio_cache_entry_name(video_id, itag)}.json")
+
+@st.cache_resource
+def _audio_cache_registry():
+    """Return the process-wide lock and in-use counts that guard the audio cache.
+
+    Streamlit sessions are threads of one process, so entries a session is still
+    uploading from are counted here and never evicted or overwritten meanwhile.
+    """
+    return {"lock": threading.RLock(), "in_use": {}}
+
+def _remove_quietly(path):
+    """Remove a file, ignoring that another session may have removed it first."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _touch_quietly(path):
+    """Mark a file as recently used, ignoring that it may have just been evicted."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+def _read_audio_cache_meta(meta_path):
+    """Load a cache entry's metadata, or None if it is missing or its audio file is gone."""
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    meta["audio_path"] = os.path.join(AUDIO_CACHE_DIR, meta.get("audio_file", ""))
+    if not os.path.isfile(meta["audio_path"]):
+        return None
+    return meta
+
+def _write_audio_cache_meta(meta):
+    """Atomically write a cache entry's metadata, which also marks it as recently used."""
+    meta_path = _audio_cache_meta_path(meta["video_id"], meta["itag"])
+    data = {k: v for k, v in meta.items() if k != "audio_path"}
+    fd, tmp_path = tempfile.mkstemp(dir=AUDIO_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, meta_path)
+
+def _acquire_audio_cache_entry(meta):
+    """Count a session as using an entry; call with the registry lock held."""
+    in_use = _audio_cache_registry()["in_use"]
+    name = _audio_cache_entry_name(meta["video_id"], meta["itag"])
+    in_use[name] = in_use.get(name, 0) + 1
+
+def audio_cache_release(meta):
+    """Let an entry returned by a lookup or store be evicted again."""
+    registry = _audio_cache_registry()
+    name = _audio_cache_entry_name(meta["video_id"], meta["itag"])
+    with registry["lock"]:
+        remaining = registry["in_use"].get(name, 0) - 1
+        if remaining > 0:
+            registry["in_use"][name] = remaining
+        else:
+            registry["in_use"].pop(name, None)
+
+def audio_cache_lookup(video_id, itag):
+    """Return the cache entry for a video stream, or None on a miss.
+
+    A returned entry is held in use until audio_cache_release is called.
+    """
+    meta_path = _audio_cache_meta_path(video_id, itag)
+    with _audio_cache_registry()["lock"]:
+        meta = _read_audio_cache_meta(meta_path)
+        if meta:
+            _touch_quietly(meta_path)  # LRU touch
+            _acquire_audio_cache_entry(meta)
+    return meta
+
+def audio_cache_find_upload(video_id, api_key: str):
+    """Return the most recently used entry for a video with a still-valid upload URL for this key.
+
+    A returned entry is held in use until audio_cache_release is called.
+    """
+    if not os.path.isdir(AUDIO_CACHE_DIR):
+        return None
+    with _audio_cache_registry()["lock"]:
+        candidates = []
+        for name in os.listdir(AUDIO_CACHE_DIR):
+            if name.startswith(f"{video_id}_") and name.endswith(".json"):
+                meta_path = os.path.join(AUDIO_CACHE_DIR, name)
+                meta = _read_audio_cache_meta(meta_path)
+                if meta and cached_upload_url(meta, api_key):
+                    try:
+                        candidates.append((os.path.getmtime(meta_path), meta_path, meta))
+                    except FileNotFoundError:
+                        continue
+        if not candidates:
+            return None
+        _, meta_path, meta = max(candidates, key=lambda c: c[0])
+        _touch_quietly(meta_path)
+        _acquire_audio_cache_entry(meta)
+    return meta
+
+def audio_cache_upload_fingerprints(video_id):
+    """Return fingerprints of the keys holding a still-valid upload URL for a video."""
+    if not os.path.isdir(AUDIO_CACHE_DIR):
+        return set()
+    fingerprints = set()
+    for name in os.listdir(AUDIO_CACHE_DIR):
+        if name.startswith(f"{video_id}_") and name.endswith(".json"):
+            meta = _read_audio_cache_meta(os.path.join(AUDIO_CACHE_DIR, name))
+            if meta and meta.get("upload_url") and time.time() - meta.get("uploaded_at", 0) <= UPLOAD_URL_TTL:
+                fingerprints.add(meta.get("upload_key"))
+    return fingerprints
+
+def cached_upload_url(meta, api_key: str):
+    """Return the entry's AssemblyAI upload URL if it belongs to this key and has not expired."""
+    if not meta.get("upload_url") or meta.get("upload_key") != _key_fingerprint(api_key):
+        return None
+    if time.time() - meta.get("uploaded_at", 0) > UPLOAD_URL_TTL:
+        return None
+    return meta["upload_url"]
+
+def audio_cache_store(video_id, itag, src_path, title="", length=0):
+    """Move a downloaded audio file into the cache and return its entry.
+
+    If another session stored the same stream first, its entry is returned and
+    src_path is left in place. Returns None (leaving src_path in place) if the
+    file alone exceeds the cache budget. A returned entry is held in use until
+    audio_cache_release is called.
+    """
+    size = os.path.getsize(src_path)
+    if size > AUDIO_CACHE_MAX_BYTES:
+        return None
+    os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+    with _audio_cache_registry()["lock"]:
+        meta = _read_audio_cache_meta(_audio_cache_meta_path(video_id, itag))
+        if not meta:
+            _evict_audio_cache(AUDIO_CACHE_MAX_BYTES - size)
+            audio_file = f"{_audio_cache_entry_name(video_id, itag)}{os.path.splitext(src_path)[1]}"
+            shutil.move(src_path, os.path.join(AUDIO_CACHE_DIR, audio_file))
+            meta = {
+                "video_id": video_id,
+                "itag": itag,
+                "audio_file": audio_file,
+                "title": title,
+                "length": length,
+                "audio_path": os.path.join(AUDIO_CACHE_DIR, audio_file),
+            }
+            _write_audio_cache_meta(meta)
+        _acquire_audio_cache_entry(meta)
+    return meta
+
+def audio_cache_set_upload(meta, upload_url, api_key: str):
+    """Record (or, with upload_url=None, forget) the AssemblyAI upload URL of a cache entry."""
+    meta["upload_url"] = upload_url
+    meta["upload_key"] = _key_fingerprint(api_key) if upload_url else None
+    meta["uploaded_at"] = time.time() if upload_url else 0
+    with _audio_cache_registry()["lock"]:
+        _write_audio_cache_meta(meta)
+
+def _evict_audio_cache(max_bytes):
+    """Delete least-recently-used entries until the cached audio fits in max_bytes.
+
+    Call with the registry lock held. Entries in use by a session are kept.
+    """
+    in_use = _audio_cache_registry()["in_use"]
+    entries = []
+    total = 0
+    for name in os.listdir(AUDIO_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        meta_path = os.path.join(AUDIO_CACHE_DIR, name)
+        meta = _read_audio_cache_meta(meta_path)
+        if not meta:
+            _remove_quietly(meta_path)
+            continue
+        try:
+            size = os.path.getsize(meta["audio_path"])
+            last_used = os.path.getmtime(meta_path)
+        except FileNotFoundError:
+            continue
+        total += size
+        if name[:-len(".json")] not in in_use:
+            entries.append((last_used, meta_path, meta["audio_path"], size))
+    for _, meta_path, audio_path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove_quietly(meta_path)
+        _remove_quietly(audio_path)
+        total -= size
+
+def _download_youtube_audio(video_id, status, workspace):
+    """Download (or reuse from the audio cache) the audio track of a YouTube video.
+
+    The download goes into the job's workspace directory. Returns an audio cache
+    entry dict, or None after reporting the error.
+    """
+    temp_audio = os.path.join(workspace, 'audio.mp4')
+    # Create a clean URL to avoid issues
+    clean_url = f"https://www.youtube.com/watch?v={video_id}"
+    # Apply the cipher fix for PyTube
+    try:
+        # Create YouTube object with additional options
+        yt = YouTube(
+            clean_url,
+            use_oauth=False,
+            allow_oauth_cache=True
+        )
+    except Exception as e:
+        st.error(f"Error initializing YouTube object: {str(e)}")
+        # Try alternative approach
+        yt = YouTube(clean_url)
+    
+    # Get video information
+    try:
+        video_title = yt.title
+        video_length = yt.length  # Length in seconds
+    except Exception as e:
+        st.warning(f"Could not get video metadata: {str(e)}. Continuing anyway...")
+        video_title = "Unknown Title"
+        video_length = 0
+    
+    # Check if video is too long (over 30 minutes)
+    if video_length > 1800:  # 30 minutes in seconds
+        st.warning(f"⚠️ Video is {video_length//60} minutes long. Processing may take a while.")
+    
+    if video_title != "Unknown Title":
+        st.info(f"📹 Video: {video_title} ({video_length//60}:{video_length%60:02d})")
+    
+    # Try multiple approaches to get audio stream
+    audio_stream = None
+    stream_attempts = [
+        lambda: yt.streams.filter(only_audio=True, file_extension='mp4').first(),
+        lambda: yt.streams.filter(only_audio=True, file_extension='webm').first(),
+        lambda: yt.streams.filter(only_audio=True).first(),
+        lambda: yt.streams.filter(progressive=True).first(),
+        lambda: yt.streams.first()
+    ]
+    
+    for attempt in stream_attempts:
+        try:
+            audio_stream = attempt()
+            if audio_stream:
+                # Update file extension if needed
+                if hasattr(audio_stream, 'subtype') and audio_stream.subtype:
+                    temp_audio = os.path.join(workspace, f'audio.{audio_stream.subtype}')
+                break
+        except Exception as e:
+            continue
+    
+    if not audio_stream:
+        st.error("Sorry, couldn't find any suitable stream for this video.")
+        return None
+
+    cached = audio_cache_lookup(video_id, audio_stream.itag)
+    if cached:
+        st.info("♻️ Using cached audio for this video.")
+        return cached
+        
+    try:
+        stream_size = audio_stream.filesize
+    except Exception:
+        stream_size = 0
+    if not reserve_workspace_space(workspace, stream_size):
+        st.error("The server is busy with other downloads right now. Please try again in a moment.")
+        return None
+
+    def report_download_progress(done_bytes, total_bytes):
+        status.update(label=f"Downloading audio from YouTube... {done_bytes * 100 // total_bytes}%")
+
+    # Download the audio over parallel byte ranges; a second attempt
+    # resumes from the ranges that already completed
+    try:
+        stream_url = audio_stream.url
+        try:
+            download_stream_ranged(stream_url, stream_size, temp_audio, on_progress=report_download_progress)
+        except Exception as ranged_error:
+            st.warning(f"Parallel download interrupted: {str(ranged_error)}. Resuming...")
+            download_stream_ranged(stream_url, stream_size, temp_audio, on_progress=report_download_progress)
+    except Exception as download_error:
+        st.error(f"Error downloading audio: {str(download_error)}")
+        # Try alternative download method (single connection, from scratch)
+        try:
+            st.info("Trying alternative download method...")
+            _discard_partial_download(temp_audio)
+            audio_stream.download(output_path=workspace, filename=os.path.basename(temp_audio))
+        except Exception as alt_error:
+            st.error(f"Alternative download also failed: {str(alt_error)}")
+            return None
+    
+    # Verify the download
+    if not os.path.exists(temp_audio):
+        st.error("Audio file was not downloaded.")
+        return None
+        
+    if os.path.getsize(temp_audio) < 1000:  # Less than 1KB
+        st.error("Downloaded audio file is too small to be valid.")
+        return None
+
+    # Uploaded from the workspace; get_youtube_transcript hands it to the cache afterwards
+    return {"video_id": video_id, "itag": audio_stream.itag, "title": video_title,
+            "length": video_length, "audio_path": temp_audio, "uncached": True}
+
+def _move_audio_to_cache(audio, workspace):
+    """Move workspace audio into the shared cache and free the job's disk reservation.
+
+    Returns the cache entry, or the workspace entry unchanged if it could not be cached.
+    """
+    try:
+        cached = audio_cache_store(audio["video_id"], audio["itag"], audio["audio_path"],
+                                   audio["title"], audio["length"])
+    except Exception as e:
+        st.warning(f"Could not cache the downloaded audio: {str(e)}")
+        return audio
+    if not cached:
+        return audio
+    if not os.path.exists(audio["audio_path"]):
+        release_workspace_space(workspace)
+    return cached
+
+def _upload_audio_to_assemblyai(audio_path, assemblyai_api_key: str, base_url, key_pool=None):
+    """Upload an audio file to AssemblyAI and return its upload_url, or None on failure."""
+    try:
+        with open(audio_path, "rb") as f:
+            response = requests.post(
+                f"{base_url}/v2/upload",
+                headers={"authorization": assemblyai_api_key},
+                data=f
+            )
+    except Exception as upload_error:
+        st.error(f"Error uploading to AssemblyAI: {str(upload_error)}")
+        return None
+        
+    if response.status_code != 200:
+        _report_key_response(key_pool, assemblyai_api_key, response)
+        st.error(f"AssemblyAI upload error: {response.text}")
+        return None
+        
+    upload_url = response.json().get("upload_url")
+    if not upload_url:
+        st.error("No upload_url returned from AssemblyAI.")
+        return None
+    return upload_url
+
+def get_youtube_transcript(yt_url, assemblyai_api_key: str, key_pool=None):
+    """Extract transcript from YouTube video using AssemblyAI
+
+    If key_pool is given, auth and rate-limit errors for the key are reported to it.
+    """
     ASSEMBLYAI_API_KEY = assemblyai_api_key
     if not ASSEMBLYAI_API_KEY:
         st.error("AssemblyAI API key not set. Please set it in the API Keys section.")
@@ -50,7 +720,7 @@ def get_youtube_transcript(yt_url, assemblyai_api_key: str):
         
     base_url = "https://api.assemblyai.com"
     headers = {"authorization": ASSEMBLYAI_API_KEY, "content-type": "application/json"}
-    temp_audio = 'temp_audio.mp4'
+    audio = None
     
     try:
         # Validate YouTube URL
@@ -64,117 +734,32 @@ def get_youtube_transcript(yt_url, assemblyai_api_key: str):
             st.error("Invalid YouTube URL format. Please enter a valid YouTube URL.")
             return None
             
-        # Create a clean URL to avoid issues
-        clean_url = f"https://www.youtube.com/watch?v={video_id}"
-            
-        with st.status("Processing YouTube video...") as status:
-            status.update(label="Downloading audio from YouTube...")
-            # Download audio from YouTube with error handling
+        with job_workspace() as workspace, st.status("Processing YouTube video...") as status:
             try:
-                # Apply the cipher fix for PyTube
-                try:
-                    # Create YouTube object with additional options
-                    yt = YouTube(
-                        clean_url,
-                        use_oauth=False,
-                        allow_oauth_cache=True
-                    )
-                except Exception as e:
-                    st.error(f"Error initializing YouTube object: {str(e)}")
-                    # Try alternative approach
-                    yt = YouTube(clean_url)
-                
-                # Get video information
-                try:
-                    video_title = yt.title
-                    video_length = yt.length  # Length in seconds
-                except Exception as e:
-                    st.warning(f"Could not get video metadata: {str(e)}. Continuing anyway...")
-                    video_title = "Unknown Title"
-                    video_length = 0
-                
-                # Check if video is too long (over 30 minutes)
-                if video_length > 1800:  # 30 minutes in seconds
-                    st.warning(f"⚠️ Video is {video_length//60} minutes long. Processing may take a while.")
-                
-                if video_title != "Unknown Title":
-                    st.info(f"📹 Video: {video_title} ({video_length//60}:{video_length%60:02d})")
-                
-                # Try multiple approaches to get audio stream
-                audio_stream = None
-                stream_attempts = [
-                    lambda: yt.streams.filter(only_audio=True, file_extension='mp4').first(),
-                    lambda: yt.streams.filter(only_audio=True, file_extension='webm').first(),
-                    lambda: yt.streams.filter(only_audio=True).first(),
-                    lambda: yt.streams.filter(progressive=True).first(),
-                    lambda: yt.streams.first()
-                ]
-                
-                for attempt in stream_attempts:
-                    try:
-                        audio_stream = attempt()
-                        if audio_stream:
-                            # Update file extension if needed
-                            if hasattr(audio_stream, 'subtype') and audio_stream.subtype:
-                                temp_audio = f'temp_audio.{audio_stream.subtype}'
-                            break
-                    except Exception as e:
-                        continue
-                
-                if not audio_stream:
-                    st.error("Sorry, couldn't find any suitable stream for this video.")
-                    return None
-                    
-                # Download the audio with a timeout
-                try:
-                    audio_stream.download(filename=temp_audio, timeout=60)
-                except Exception as download_error:
-                    st.error(f"Error downloading audio: {str(download_error)}")
-                    # Try alternative download method
-                    try:
-                        st.info("Trying alternative download method...")
-                        audio_stream.download(output_path=".", filename=temp_audio)
-                    except Exception as alt_error:
-                        st.error(f"Alternative download also failed: {str(alt_error)}")
+                # A retry after a failed transcription can reuse the earlier upload
+                audio = audio_cache_find_upload(video_id, ASSEMBLYAI_API_KEY)
+                if audio:
+                    upload_url = cached_upload_url(audio, ASSEMBLYAI_API_KEY)
+                    st.info(f"♻️ Reusing uploaded audio for {audio.get('title') or video_id}; skipping download and upload.")
+                else:
+                    status.update(label="Downloading audio from YouTube...")
+                    audio = _download_youtube_audio(video_id, status, workspace)
+                    if not audio:
                         return None
-                
-                # Verify the download
-                if not os.path.exists(temp_audio):
-                    st.error("Audio file was not downloaded.")
-                    return None
-                    
-                if os.path.getsize(temp_audio) < 1000:  # Less than 1KB
-                    st.error("Downloaded audio file is too small to be valid.")
-                    os.remove(temp_audio)
-                    return None
-                    
-                status.update(label="Uploading audio to transcription service...")
-                # Upload audio file to AssemblyAI
-                try:
-                    with open(temp_audio, "rb") as f:
-                        response = requests.post(
-                            f"{base_url}/v2/upload",
-                            headers={"authorization": ASSEMBLYAI_API_KEY},
-                            data=f
-                        )
-                except Exception as upload_error:
-                    st.error(f"Error uploading to AssemblyAI: {str(upload_error)}")
-                    if os.path.exists(temp_audio):
-                        os.remove(temp_audio)
-                    return None
-                    
-                # Clean up temp file immediately after upload
-                if os.path.exists(temp_audio):
-                    os.remove(temp_audio)
-                    
-                if response.status_code != 200:
-                    st.error(f"AssemblyAI upload error: {response.text}")
-                    return None
-                    
-                upload_url = response.json().get("upload_url")
-                if not upload_url:
-                    st.error("No upload_url returned from AssemblyAI.")
-                    return None
+                        
+                    upload_url = cached_upload_url(audio, ASSEMBLYAI_API_KEY)
+                    if not upload_url:
+                        status.update(label="Uploading audio to transcription service...")
+                        upload_url = _upload_audio_to_assemblyai(audio["audio_path"], ASSEMBLYAI_API_KEY, base_url, key_pool)
+                        # Keep the audio for a retry whether or not the upload worked
+                        if audio.get("uncached"):
+                            audio = _move_audio_to_cache(audio, workspace)
+                        if not upload_url:
+                            return None
+                        if not audio.get("uncached"):
+                            audio_cache_set_upload(audio, upload_url, ASSEMBLYAI_API_KEY)
+                            
+                video_length = audio.get("length") or 0
                     
                 # Request transcript
                 status.update(label="Requesting transcription...")
@@ -191,6 +776,7 @@ def get_youtube_transcript(yt_url, assemblyai_api_key: str):
                 )
                 
                 if transcript_response.status_code != 200:
+                    _report_key_response(key_pool, ASSEMBLYAI_API_KEY, transcript_response)
                     st.error(f"AssemblyAI transcript request error: {transcript_response.text}")
                     return None
                     
@@ -211,6 +797,7 @@ def get_youtube_transcript(yt_url, assemblyai_api_key: str):
                 while True:
                     polling_response = requests.get(polling_endpoint, headers=headers)
                     if polling_response.status_code != 200:
+                        _report_key_response(key_pool, ASSEMBLYAI_API_KEY, polling_response)
                         st.error(f"Error checking transcription status: {polling_response.text}")
                         return None
                         
@@ -228,6 +815,9 @@ def get_youtube_transcript(yt_url, assemblyai_api_key: str):
                         return transcription_result.get('text')
                     elif status_value == 'error':
                         st.error(f"Transcription failed: {transcription_result.get('error')}")
+                        # The uploaded audio itself may be the problem; don't reuse it
+                        if not audio.get("uncached"):
+                            audio_cache_set_upload(audio, None, ASSEMBLYAI_API_KEY)
                         return None
                     else:
                         # Wait before polling again
@@ -239,32 +829,104 @@ def get_youtube_transcript(yt_url, assemblyai_api_key: str):
                 
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
-        # Clean up temp file if it exists
-        if os.path.exists(temp_audio):
-            os.remove(temp_audio)
         return None
+    finally:
+        # Let other sessions evict the cached audio again
+        if audio and not audio.get("uncached"):
+            audio_cache_release(audio)
 
-def generate_yt_blog(yt_url, assemblyai_api_key: str, gemini_api_key: str):
-    """Generate a blog post from a YouTube video"""
-    transcript = get_youtube_transcript(yt_url, assemblyai_api_key)
-    if not transcript:
-        return None
-        
-    # Check transcript length
-    if len(transcript.split()) < 50:  # Less than 50 words
-        st.warning("⚠️ The transcript is very short. The generated blog may not be comprehensive.")
-        
-    return summarize_youtube_video(transcript, gemini_api_key)
+# Transcript compaction. Spoken transcripts carry filler words, stutters and
+# repeated sentences that cost prompt tokens without adding content. Every pass
+# below is a single regex scan or a bounded look-back, so compaction is linear
+# in the transcript length.
+# Only a following comma goes with the filler; a sentence-ending period is kept
+FILLER_WORD_PATTERN = r"(?:u+m+|u+h+|e+r+m+|a+h+|h+m+|m+h+m+)\b,?\s*"
+FILLER_WORDS = re.compile(r"\b" + FILLER_WORD_PATTERN, re.IGNORECASE)
+# Discourse fillers, only when set off by commas or opening a sentence. Fillers
+# opening a sentence are removed with the next letter captured, so the sentence
+# can be recapitalized without touching any other text.
+FILLER_PHRASES = re.compile(r",\s*(?:you know|i mean|like|basically|so to speak)\s*,", re.IGNORECASE)
+LEADING_FILLERS = re.compile(
+    r"(^|[.!?]\s+)(?:(?:you know|i mean|like|okay so|so yeah)\s*,\s*|" + FILLER_WORD_PATTERN + r")+(\w?)", re.IGNORECASE
+)
+# A word or short phrase repeated back to back ("I I think", "in the in the").
+# Only letters count, and a repeat split by a comma ("I know, I know") or a
+# capitalized repeat ("Bora Bora", "New York New York") is kept.
+REPEATED_PHRASE = re.compile(r"\b([^\W\d_]+(?:\s+[^\W\d_]+){0,2})(?:\s+\1\b)+", re.IGNORECASE)
+# Words whose doubling is grammatical ("that that", "had had") or meaningful
+# ("very very", "no no no", "bye bye"), so it is kept
+MEANINGFUL_REPEATS = {
+    "that", "had", "very", "really", "so", "too", "much", "many", "more", "far", "long",
+    "no", "yes", "bye", "again", "over", "round", "knock", "ha",
+}
+NEAR_DUPLICATE_WINDOW = 5  # Earlier sentences compared against each new one
+NEAR_DUPLICATE_SIMILARITY = 0.8  # Word-trigram Jaccard similarity to treat as a repeat
+# Sentences differing in these are never treated as repeats of each other
+NEGATION = re.compile(r"\b(?:not|no|never|nor|none|nobody|nothing|nowhere|neither|cannot)\b|n't\b", re.IGNORECASE)
+CHARS_PER_TOKEN = 4  # Rough token estimate for English text
 
-def summarize_youtube_video(yt_transcript, gemini_api_key: str):
-    """Use Gemini AI to transform transcript into a blog post"""
-    # Truncate transcript if it's too long for the model
-    max_transcript_length = 25000  # Characters
-    if len(yt_transcript) > max_transcript_length:
-        st.warning(f"⚠️ Transcript is very long ({len(yt_transcript)} characters). Truncating to {max_transcript_length} characters.")
-        yt_transcript = yt_transcript[:max_transcript_length] + "..."
+def _collapse_repeat(match):
+    """Return one copy of a repeated phrase, or the whole match if the repeat is meaningful."""
+    phrase = match.group(1)
+    repeats = match.group(0)[len(phrase):].split()
+    if phrase.lower() in MEANINGFUL_REPEATS or any(word[0].isupper() and word != "I" for word in repeats):
+        return match.group(0)
+    return phrase
+
+def compact_transcript(transcript):
+    """Strip disfluencies and repeated sentences from a spoken transcript.
+
+    Returns (compacted_text, stats) where stats holds the original and compacted
+    character counts and estimated token counts.
+    """
+    text = FILLER_PHRASES.sub(" ", transcript)
+    text = LEADING_FILLERS.sub(lambda m: m.group(1) + m.group(2).upper(), text)
+    text = FILLER_WORDS.sub("", text)
+    text = REPEATED_PHRASE.sub(_collapse_repeat, text)
     
-    prompt = f'''
+    # Drop sentences that repeat an earlier one verbatim or nearly verbatim.
+    # Similarity is over word trigrams, so word order matters, and sentences
+    # whose negations differ are always kept.
+    seen = set()
+    recent = []
+    kept = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        words = re.findall(r"\w+", sentence.lower())
+        if not words:
+            continue
+        if len(words) >= 4:
+            normalized = " ".join(words)
+            trigrams = set(zip(words, words[1:], words[2:]))
+            negations = sorted(n.lower() for n in NEGATION.findall(sentence))
+            if normalized in seen or any(
+                negations == other_negations
+                and len(trigrams & other) / len(trigrams | other) >= NEAR_DUPLICATE_SIMILARITY
+                for other, other_negations in recent
+            ):
+                continue
+            seen.add(normalized)
+            recent = (recent + [(trigrams, negations)])[-NEAR_DUPLICATE_WINDOW:]
+        kept.append(sentence)
+    text = " ".join(kept)
+    
+    # Normalize whitespace and punctuation left behind by the removals
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s+([,.!?;:])", r"\1", text)
+    text = re.sub(r",(?=[,.!?])", "", text)
+    text = text.strip()
+    
+    stats = {
+        "original_chars": len(transcript),
+        "compacted_chars": len(text),
+        "original_tokens": len(transcript) // CHARS_PER_TOKEN,
+        "compacted_tokens": len(text) // CHARS_PER_TOKEN,
+    }
+    return text, stats
+
+# Prompt that turns a transcript into a blog post. {instructions} holds extra,
+# variant-specific guidelines (see build_blog_prompt_template) and {transcript}
+# is filled in at generation time.
+BLOG_PROMPT_TEMPLATE = '''
     You are an expert content writer specializing in digital content writing. I will provide you with a transcript.
     Your task is to transform a given transcript into a well-formatted and informative blog article.
 
@@ -279,66 +941,325 @@ def summarize_youtube_video(yt_transcript, gemini_api_key: str):
     8. Punctuation: Use appropriate question marks at the end of questions.
     9. Pass AI Detection Tools: Create content that easily passes AI plagiarism detection tools.
     10. Rephrase words like 'video, youtube, channel' with 'article, blog' and such suitable words.
-
+{instructions}
     Make sure that your response is well formatted, with headings, lists, bullet points etc. Respond in markdown style.
     Follow above guidelines to craft a blog content from the following transcript:
 
-    Transcript: {yt_transcript}
+    Transcript: {transcript}
     '''
-    
+
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+GEMINI_FALLBACK_MODEL_NAME = "gemini-1.0-pro"
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_k": 0,
+    "max_output_tokens": 4096,
+}
+
+# Generation cache. A blog generated from the same transcript, prompt template,
+# model and generation config is served from disk instead of calling Gemini
+# again. Entries expire after a TTL and the least recently used are evicted
+# beyond a maximum entry count.
+GENERATION_CACHE_DIR = _get_secret_or_env('ALWRITY_GENERATION_CACHE_DIR') or os.path.join('.alwrity_cache', 'generations')
+GENERATION_CACHE_TTL = float(_get_secret_or_env('ALWRITY_GENERATION_CACHE_TTL_HOURS') or 72) * 60 * 60
+GENERATION_CACHE_MAX_ENTRIES = int(_get_secret_or_env('ALWRITY_GENERATION_CACHE_MAX_ENTRIES') or 500)
+
+# Blog variants. Each option adds a guideline to the prompt; the chosen lengths,
+# tones and languages are combined into one variant per combination.
+BLOG_LENGTH_OPTIONS = {
+    "Standard": "",
+    "Short (~500 words)": "Length: Keep the article to roughly 500 words.",
+    "Long-form (1500+ words)": "Length: Write an in-depth, long-form article of at least 1500 words.",
+}
+BLOG_TONE_OPTIONS = {
+    "Default": "",
+    "Professional": "Tone: Use a professional, authoritative tone suited to industry readers.",
+    "Casual": "Tone: Use a relaxed, conversational tone as if talking to a friend.",
+    "Technical": "Tone: Use precise, technical language and keep implementation details.",
+}
+BLOG_LANGUAGE_OPTIONS = ["English", "Spanish", "French", "German", "Portuguese", "Hindi", "Japanese"]
+MAX_BLOG_VARIANTS = 12  # Larger selections are refused rather than truncated
+MAX_PARALLEL_VARIANTS = int(_get_secret_or_env('ALWRITY_MAX_PARALLEL_VARIANTS') or 4)
+
+def build_blog_variants(lengths, tones, languages) -> list:
+    """Combine chosen lengths, tones and languages into variant dicts with a label and instructions."""
+    variants = []
+    for length in lengths or ["Standard"]:
+        for tone in tones or ["Default"]:
+            for language in languages or ["English"]:
+                instructions = [BLOG_LENGTH_OPTIONS[length], BLOG_TONE_OPTIONS[tone]]
+                if language != "English":
+                    instructions.append(f"Language: Write the entire article in {language}.")
+                variants.append({
+                    "label": " · ".join([length, tone, language]),
+                    "instructions": [line for line in instructions if line],
+                })
+    return variants
+
+def build_blog_prompt_template(instructions=()):
+    """Return BLOG_PROMPT_TEMPLATE with extra guidelines filled in, leaving {transcript} open."""
+    lines = "".join(
+        f"    {number}. {line.replace('{', '{{').replace('}', '}}')}\n"
+        for number, line in enumerate(instructions, start=11)
+    )
+    return BLOG_PROMPT_TEMPLATE.format(transcript="{transcript}", instructions=lines)
+
+def generation_cache_key(transcript, prompt_template, model_name, generation_config) -> str:
+    """Return the cache key for a generation request."""
+    payload = json.dumps([transcript, prompt_template, model_name, generation_config], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def generation_cache_get(cache_key):
+    """Return the cached generation for cache_key, or None if missing or expired."""
+    path = os.path.join(GENERATION_CACHE_DIR, f"{cache_key}.json")
     try:
-        response = generate_text_with_exception_handling(prompt, gemini_api_key)
-        return response
-    except Exception as err:
-        st.error(f"Failed to get response from LLM: {str(err)}")
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
         return None
+    if time.time() - entry.get("created_at", 0) > GENERATION_CACHE_TTL:
+        return None
+    _touch_quietly(path)  # LRU touch
+    return entry.get("text")
 
-def generate_text_with_exception_handling(prompt, gemini_api_key: str):
-    """Generate text using Gemini AI with proper error handling"""
-    api_key = gemini_api_key
-    if not api_key:
-        st.error("Gemini API key not set. Please set it in the API Keys section.")
+def generation_cache_put(cache_key, text):
+    """Store a generation under cache_key and evict expired or least recently used entries."""
+    os.makedirs(GENERATION_CACHE_DIR, exist_ok=True)
+    path = os.path.join(GENERATION_CACHE_DIR, f"{cache_key}.json")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"created_at": time.time(), "text": text}, f)
+    os.replace(tmp_path, path)
+    _evict_generation_cache()
+
+def _evict_generation_cache():
+    """Delete expired entries, then the least recently used ones beyond the entry limit."""
+    now = time.time()
+    entries = []
+    for name in os.listdir(GENERATION_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(GENERATION_CACHE_DIR, name)
+        try:
+            last_used = os.path.getmtime(path)
+        except OSError:
+            continue
+        # created_at <= last_used, so entries unused for a full TTL are certainly expired
+        if now - last_used > GENERATION_CACHE_TTL:
+            _remove_quietly(path)
+        else:
+            entries.append((last_used, path))
+    for _, path in sorted(entries)[:max(0, len(entries) - GENERATION_CACHE_MAX_ENTRIES)]:
+        _remove_quietly(path)
+
+def _cache_generation(transcript, prompt_template, model_name, text):
+    """Store a generation under the model that produced it; a failed write is logged, not raised."""
+    try:
+        cache_key = generation_cache_key(transcript, prompt_template, model_name, GEMINI_GENERATION_CONFIG)
+        generation_cache_put(cache_key, text)
+    except Exception:
+        logger.exception("Could not write to the generation cache")
+
+def _transcribe_with_pool(yt_url, assemblyai_pool):
+    """Transcribe a YouTube video with a key leased from assemblyai_pool"""
+    # Upload URLs only work for the key that uploaded, so prefer that key for a retry
+    video_id = extract_video_id(yt_url) if yt_url else None
+    uploaders = audio_cache_upload_fingerprints(video_id) if video_id else set()
+    preferred = [key for key in assemblyai_pool.keys if _key_fingerprint(key) in uploaders]
+    with assemblyai_pool.lease(prefer=preferred) as assemblyai_key:
+        if not assemblyai_key:
+            st.error(f"All AssemblyAI keys are rate limited or rejected. Please try again in {assemblyai_pool.seconds_until_available()} seconds.")
+            return None
+        transcript = get_youtube_transcript(yt_url, assemblyai_key, assemblyai_pool)
+    if not transcript:
         return None
         
+    # Check transcript length
+    if len(transcript.split()) < 50:  # Less than 50 words
+        st.warning("⚠️ The transcript is very short. The generated blog may not be comprehensive.")
+    return transcript
+
+def generate_yt_blog(yt_url, assemblyai_pool, gemini_pool, compact=True, regenerate=False, instructions=()):
+    """Generate a blog post from a YouTube video, using keys from the given key pools"""
+    transcript = _transcribe_with_pool(yt_url, assemblyai_pool)
+    if not transcript:
+        return None
+    return summarize_youtube_video(transcript, gemini_pool, compact, regenerate, instructions)
+
+def generate_yt_blog_variants(yt_url, variants, assemblyai_pool, gemini_pool, compact=True, regenerate=False):
+    """Transcribe a YouTube video once, then generate several blog variants from it.
+
+    Yields the same tuples as generate_blog_variants, in order of completion.
+    """
+    transcript = _transcribe_with_pool(yt_url, assemblyai_pool)
+    if not transcript:
+        return
+    transcript = prepare_transcript_for_prompt(transcript, compact)
+    yield from generate_blog_variants(transcript, variants, gemini_pool, regenerate)
+
+def generate_blog_variants(transcript, variants, gemini_pool, regenerate=False, max_workers=MAX_PARALLEL_VARIANTS):
+    """Generate one blog per variant concurrently, with at most max_workers Gemini calls in flight.
+
+    Yields (variant, blog_text, from_cache, error) as each variant finishes. The
+    worker threads never touch the Streamlit UI; render the results as they arrive.
+    """
+    if not variants:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(variants)))
     try:
-        genai.configure(api_key=api_key)
-        
-        generation_config = {
-            "temperature": 0.7,
-            "top_k": 0,
-            "max_output_tokens": 4096,
+        futures = {
+            executor.submit(
+                _generate_blog_cached, transcript, build_blog_prompt_template(variant["instructions"]),
+                gemini_pool, regenerate
+            ): variant
+            for variant in variants
         }
-        
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-        ]
-        
-        # Try to use gemini-1.5-flash, fall back to gemini-1.0-pro if not available
-        try:
-            model = genai.GenerativeModel(
-                model_name="gemini-1.5-flash",
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
-        except Exception as e:
-            st.warning(f"Could not use gemini-1.5-flash: {str(e)}. Falling back to gemini-1.0-pro.")
-            model = genai.GenerativeModel(
-                model_name="gemini-1.0-pro",
-                generation_config=generation_config,
-                safety_settings=safety_settings
+        for future in as_completed(futures):
+            variant = futures[future]
+            try:
+                blog_text, from_cache = future.result()
+            except Exception as e:
+                yield variant, None, False, e
+            else:
+                yield variant, blog_text, from_cache, None
+    finally:
+        # Don't start variants nobody will see if the run is stopped early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def _generate_blog_cached(transcript, prompt_template, gemini_pool, regenerate=False, notify=None):
+    """Return (blog_text, from_cache) for a transcript, without touching the Streamlit UI.
+
+    Results are served from the generation cache unless regenerate is set, and
+    are stored under the model that actually ran, which may be the fallback.
+    """
+    if not regenerate:
+        cache_key = generation_cache_key(transcript, prompt_template, GEMINI_MODEL_NAME, GEMINI_GENERATION_CONFIG)
+        cached_blog = generation_cache_get(cache_key)
+        if cached_blog:
+            return cached_blog, True
+    blog_text, model_name = _generate_with_gemini(prompt_template.format(transcript=transcript), gemini_pool, notify)
+    # A failed cache write must not lose a blog Gemini already produced
+    _cache_generation(transcript, prompt_template, model_name, blog_text)
+    return blog_text, False
+
+def prepare_transcript_for_prompt(yt_transcript, compact=True):
+    """Compact (optionally) and truncate a transcript before it goes into a prompt"""
+    if compact:
+        yt_transcript, stats = compact_transcript(yt_transcript)
+        saved_chars = stats["original_chars"] - stats["compacted_chars"]
+        if saved_chars > 0:
+            st.caption(
+                f"🧹 Transcript compacted: {stats['original_chars']:,} → {stats['compacted_chars']:,} characters "
+                f"({saved_chars * 100 // stats['original_chars']}% smaller, "
+                f"~{stats['original_tokens'] - stats['compacted_tokens']:,} fewer tokens)"
             )
-            
+        
+    # Truncate transcript if it's too long for the model
+    max_transcript_length = 25000  # Characters
+    if len(yt_transcript) > max_transcript_length:
+        st.warning(f"⚠️ Transcript is very long ({len(yt_transcript)} characters). Truncating to {max_transcript_length} characters.")
+        yt_transcript = yt_transcript[:max_transcript_length] + "..."
+    return yt_transcript
+
+def summarize_youtube_video(yt_transcript, gemini_pool, compact=True, regenerate=False, instructions=()):
+    """Use Gemini AI to transform transcript into a blog post
+
+    instructions are extra prompt guidelines, such as those of a single chosen variant.
+    Results are served from the generation cache unless regenerate is set.
+    """
+    yt_transcript = prepare_transcript_for_prompt(yt_transcript, compact)
+    
+    if not gemini_pool:
+        st.error("Gemini API key not set. Please set it in the API Keys section.")
+        return None
+    try:
         with st.spinner("Generating blog content with AI..."):
-            convo = model.start_chat(history=[])
-            response = convo.send_message(prompt)
-            return response.text
-            
-    except Exception as e:
-        st.error(f"Error generating text with Gemini: {str(e)}")
+            blog_text, from_cache = _generate_blog_cached(
+                yt_transcript, build_blog_prompt_template(instructions), gemini_pool, regenerate, notify=st.warning
+            )
+    except Exception as err:
+        st.error(f"Failed to get response from LLM: {str(err)}")
         return None
+        
+    if from_cache:
+        st.info("♻️ Loaded the blog previously generated from this transcript. Tick “Regenerate” for a fresh version.")
+    return blog_text
+
+def _gemini_error_status(error):
+    """Return the HTTP status of a Gemini API error, treating an invalid key as 401."""
+    status_code = getattr(error, "code", None)
+    if status_code == 400 and "API key" in str(error):
+        return 401
+    return status_code if isinstance(status_code, int) else None
+
+def _bind_gemini_client(model, api_key):
+    """Make model send its requests with api_key, independently of genai.configure.
+
+    genai.configure sets one key for the whole process, which concurrent sessions
+    using different keys would race on. google-generativeai has no public per-model
+    key option, so this sets the private GenerativeModel._client, which the SDK
+    (0.3 through 0.8.x, the final release) creates lazily on the first request.
+    """
+    if getattr(model, "_client", "missing") is not None:
+        raise RuntimeError(
+            "Unsupported google-generativeai version: GenerativeModel._client not found. "
+            "Install a 0.8.x release (see requirements.txt)."
+        )
+    model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+def _generate_with_gemini(prompt, gemini_pool, notify=None):
+    """Send prompt to Gemini with a key leased from gemini_pool and return (text, model_name).
+
+    A key that is rejected or rate limited is benched and the request is retried
+    with the next available key. Raises RuntimeError when no key can serve it.
+    Warnings go to notify(message) if given, so this is safe in worker threads.
+    """
+    safety_settings = [
+        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    ]
+    
+    for _ in range(len(gemini_pool)):
+        with gemini_pool.lease() as api_key:
+            if not api_key:
+                raise RuntimeError(f"All Gemini keys are rate limited or rejected. Please try again in {gemini_pool.seconds_until_available()} seconds.")
+                
+            try:
+                # Try to use gemini-1.5-flash, fall back to gemini-1.0-pro if not available
+                model_name = GEMINI_MODEL_NAME
+                try:
+                    model = genai.GenerativeModel(
+                        model_name=model_name,
+                        generation_config=GEMINI_GENERATION_CONFIG,
+                        safety_settings=safety_settings
+                    )
+                except Exception as e:
+                    if notify:
+                        notify(f"Could not use {GEMINI_MODEL_NAME}: {str(e)}. Falling back to {GEMINI_FALLBACK_MODEL_NAME}.")
+                    model_name = GEMINI_FALLBACK_MODEL_NAME
+                    model = genai.GenerativeModel(
+                        model_name=model_name,
+                        generation_config=GEMINI_GENERATION_CONFIG,
+                        safety_settings=safety_settings
+                    )
+                _bind_gemini_client(model, api_key)
+                
+                convo = model.start_chat(history=[])
+                response = convo.send_message(prompt)
+                return response.text, model_name
+                    
+            except Exception as e:
+                status_code = _gemini_error_status(e)
+                gemini_pool.report_failure(api_key, status_code)
+                if status_code in (401, 403, 429):
+                    if notify:
+                        notify(f"Gemini key was rejected or rate limited (HTTP {status_code}). Retrying with another key...")
+                    continue
+                raise
+                
+    raise RuntimeError("Every configured Gemini key was rejected or rate limited.")
 
 def add_custom_css():
     """Add custom CSS for better styling"""
@@ -521,6 +1442,46 @@ def create_status_indicator(status, text):
     status_class = f"status-{status}"
     return f'<span class="status-indicator {status_class}"></span>{text}'
 
+def render_blog_variants(variant_results, variants):
+    """Show each blog variant in its own tab, filling tabs in as variants complete"""
+    placeholders = None
+    completed = 0
+    for variant, blog_text, from_cache, error in variant_results:
+        if placeholders is None:
+            # Transcription succeeded; lay out one tab per variant
+            st.markdown("---")
+            st.markdown("## 📝 Generated Blog Variants")
+            progress_text = st.empty()
+            tabs = st.tabs([v["label"] for v in variants])
+            placeholders = {}
+            for v, tab in zip(variants, tabs):
+                with tab:
+                    placeholders[v["label"]] = st.empty()
+                    placeholders[v["label"]].info("⏳ Generating...")
+        completed += 1
+        progress_text.caption(f"✅ {completed} of {len(variants)} variants ready")
+        
+        with placeholders[variant["label"]].container():
+            if error or not blog_text:
+                st.error(f"Error generating this variant: {str(error) if error else 'empty response'}")
+                continue
+            if from_cache:
+                st.caption("♻️ Loaded from cache. Tick “Regenerate” for a fresh version.")
+            st.markdown(blog_text)
+            st.download_button(
+                label="📄 Download as MD",
+                data=blog_text,
+                file_name=f"youtube_blog_post_{re.sub(r'[^a-z0-9]+', '_', variant['label'].lower()).strip('_')}.md",
+                mime="text/markdown",
+                key=f"download_{variant['label']}"
+            )
+    
+    if placeholders is None:
+        create_info_card(
+            "<h4>❌ Generation Failed</h4><p>Unable to generate blog content. Please check your YouTube URL and API keys.</p>",
+            "error"
+        )
+
 def main():
     """Main application function"""
     st.set_page_config(
@@ -551,14 +1512,15 @@ def main():
         value="",
         type="password",
         placeholder="Enter your AssemblyAI API key",
-        help="Get your API key from https://www.assemblyai.com/",
+        help="Get your API key from https://www.assemblyai.com/. Separate several keys with commas to spread jobs across them.",
         key="assemblyai_input"
     )
     
-    # Resolve effective AssemblyAI key (user input takes precedence, else env/secrets)
-    effective_assemblyai_key = assemblyai_input or _get_secret_or_env('ASSEMBLYAI_API_KEY')
-    if effective_assemblyai_key:
-        st.sidebar.markdown(create_status_indicator("success", "AssemblyAI Connected"), unsafe_allow_html=True)
+    # Resolve effective AssemblyAI keys (user input takes precedence, else env/secrets)
+    assemblyai_keys = resolve_api_keys(assemblyai_input, 'ASSEMBLYAI_API_KEY')
+    if assemblyai_keys:
+        key_count = f" ({len(assemblyai_keys)} keys)" if len(assemblyai_keys) > 1 else ""
+        st.sidebar.markdown(create_status_indicator("success", f"AssemblyAI Connected{key_count}"), unsafe_allow_html=True)
     else:
         st.sidebar.markdown(create_status_indicator("error", "AssemblyAI Not Connected"), unsafe_allow_html=True)
     
@@ -568,21 +1530,22 @@ def main():
         value="",
         type="password",
         placeholder="Enter your Gemini API key",
-        help="Get your API key from https://makersuite.google.com/app/apikey",
+        help="Get your API key from https://makersuite.google.com/app/apikey. Separate several keys with commas to spread jobs across them.",
         key="gemini_input"
     )
     
-    # Resolve effective Gemini key (user input takes precedence, else env/secrets)
-    effective_gemini_key = gemini_input or _get_secret_or_env('GEMINI_API_KEY')
-    if effective_gemini_key:
-        st.sidebar.markdown(create_status_indicator("success", "Gemini Connected"), unsafe_allow_html=True)
+    # Resolve effective Gemini keys (user input takes precedence, else env/secrets)
+    gemini_keys = resolve_api_keys(gemini_input, 'GEMINI_API_KEY')
+    if gemini_keys:
+        key_count = f" ({len(gemini_keys)} keys)" if len(gemini_keys) > 1 else ""
+        st.sidebar.markdown(create_status_indicator("success", f"Gemini Connected{key_count}"), unsafe_allow_html=True)
     else:
         st.sidebar.markdown(create_status_indicator("error", "Gemini Not Connected"), unsafe_allow_html=True)
     
     st.sidebar.markdown("---")
     
     # Check for missing API keys (based on effective values)
-    missing_keys = validate_api_keys(effective_assemblyai_key, effective_gemini_key)
+    missing_keys = validate_api_keys(assemblyai_keys, gemini_keys)
     if missing_keys:
         create_info_card(
             f"""<h4>🔑 API Keys Required</h4>
@@ -668,6 +1631,37 @@ def main():
         - Webinars and presentations
         """)
     
+    # Generation settings
+    with st.expander("⚙️ Generation Settings", expanded=False):
+        compact_transcript_enabled = st.checkbox(
+            "🧹 Compact transcript before generation",
+            value=True,
+            help="Removes filler words, stutters and repeated sentences to cut prompt size and generation time."
+        )
+        regenerate = st.checkbox(
+            "🔁 Regenerate (skip cached result)",
+            value=False,
+            help="Blogs are cached per transcript and settings. Tick this to ask the AI for a fresh version."
+        )
+        
+        st.markdown("**🎨 Variants** — pick several options to get one blog per combination from a single transcription.")
+        variant_col1, variant_col2, variant_col3 = st.columns(3)
+        with variant_col1:
+            variant_lengths = st.multiselect("Length", list(BLOG_LENGTH_OPTIONS), default=["Standard"])
+        with variant_col2:
+            variant_tones = st.multiselect("Tone", list(BLOG_TONE_OPTIONS), default=["Default"])
+        with variant_col3:
+            variant_languages = st.multiselect("Language", BLOG_LANGUAGE_OPTIONS, default=["English"])
+        variants = build_blog_variants(variant_lengths, variant_tones, variant_languages)
+        too_many_variants = len(variants) > MAX_BLOG_VARIANTS
+        if too_many_variants:
+            st.error(
+                f"❌ These options combine into {len(variants)} variants, but at most {MAX_BLOG_VARIANTS} can be "
+                f"generated at once. Deselect some lengths, tones or languages."
+            )
+        elif len(variants) > 1:
+            st.caption(f"{len(variants)} variants will be generated in parallel.")
+    
     # Generate button with enhanced styling
     st.markdown("<br>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -676,20 +1670,39 @@ def main():
             "🚀 Generate Blog Post", 
             type="primary", 
             use_container_width=True,
-            disabled=not yt_url or not extract_video_id(yt_url) if yt_url else True
+            disabled=too_many_variants or (not yt_url or not extract_video_id(yt_url) if yt_url else True)
         )
     
     # Processing and results
     if generate_clicked:
         if not yt_url:
             st.error("Please enter a YouTube URL.")
+        elif len(variants) > 1:
+            render_blog_variants(
+                generate_yt_blog_variants(
+                    yt_url,
+                    variants,
+                    ApiKeyPool("assemblyai", assemblyai_keys),
+                    ApiKeyPool("gemini", gemini_keys),
+                    compact=compact_transcript_enabled,
+                    regenerate=regenerate
+                ),
+                variants
+            )
         else:
             # Create a results container
             results_container = st.container()
             
             with results_container:
                 with st.spinner("🔄 Processing your request..."):
-                    blog_content = generate_yt_blog(yt_url, effective_assemblyai_key, effective_gemini_key)
+                    blog_content = generate_yt_blog(
+                        yt_url,
+                        ApiKeyPool("assemblyai", assemblyai_keys),
+                        ApiKeyPool("gemini", gemini_keys),
+                        compact=compact_transcript_enabled,
+                        regenerate=regenerate,
+                        instructions=variants[0]["instructions"]
+                    )
                     
                 if blog_content:
                     # Success message with animation
@@ -0,0 +1,131 @@
+"""Focused checks for API key parsing and ApiKeyPool selection, without network access."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import alwrity_yt_blog
+from alwrity_yt_blog import (
+    KEY_COOLDOWN_RATE_LIMITED,
+    KEY_COOLDOWN_UNAUTHORIZED,
+    ApiKeyPool,
+    _key_fingerprint,
+    _transcribe_with_pool,
+    parse_api_keys,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(alwrity_yt_blog.time, "time", clock.time)
+    alwrity_yt_blog._api_key_registry.clear()
+    yield clock
+    alwrity_yt_blog._api_key_registry.clear()
+
+
+def test_parse_api_keys():
+    assert parse_api_keys("a, b:3\nc:x,,a:2") == [("a", 2.0), ("b", 3.0), ("c", 1.0)]
+    assert parse_api_keys(["a", "", "b:0"]) == [("a", 1.0), ("b", 0.1)]
+    # resolve_api_keys passes secrets that may themselves be TOML arrays
+    assert parse_api_keys(["", ["a", "b:2"]]) == [("a", 1.0), ("b", 2.0)]
+
+
+def test_spreads_requests_least_loaded_first():
+    pool = ApiKeyPool("test", [("a", 1.0), ("b", 1.0)])
+    first, second = pool.acquire(), pool.acquire()
+    assert {first, second} == {"a", "b"}
+    pool.release(first)
+    assert pool.acquire() == first
+
+
+def test_weights_give_keys_more_requests():
+    pool = ApiKeyPool("test", [("a", 1.0), ("b", 3.0)])
+    picks = [pool.acquire() for _ in range(4)]
+    assert picks.count("b") == 3
+
+
+def test_preferred_key_wins_regardless_of_load():
+    pool = ApiKeyPool("test", [("a", 1.0), ("b", 1.0)])
+    assert pool.acquire(prefer=["b"]) == "b"
+    assert pool.acquire(prefer=["b"]) == "b"
+    pool.report_failure("b", 429)
+    assert pool.acquire(prefer=["b"]) == "a"
+
+
+def test_rejected_and_rate_limited_keys_cool_down(clock):
+    pool = ApiKeyPool("test", [("a", 1.0), ("b", 1.0)])
+    pool.report_failure("a", 401)
+    pool.report_failure("b", 429)
+    assert pool.acquire() is None
+    assert pool.seconds_until_available() == KEY_COOLDOWN_RATE_LIMITED
+    clock.now += KEY_COOLDOWN_RATE_LIMITED
+    assert pool.acquire() == "b"
+    clock.now += KEY_COOLDOWN_UNAUTHORIZED
+    assert pool.acquire() == "a"
+
+
+def test_retry_after_sets_cooldown(clock):
+    pool = ApiKeyPool("test", [("a", 1.0)])
+    pool.report_failure("a", 429, retry_after=5)
+    assert pool.seconds_until_available() == 5
+    clock.now += 5
+    with pool.lease() as key:
+        assert key == "a"
+
+
+def test_other_errors_count_without_benching():
+    pool = ApiKeyPool("test", [("a", 1.0), ("b", 1.0)])
+    with pool.lease() as key:
+        pool.report_failure(key, 500)
+    other = pool.acquire()
+    assert other != key
+    assert pool.acquire() == key
+
+
+def test_pools_share_state_per_key():
+    first = ApiKeyPool("test", [("a", 1.0), ("b", 1.0)])
+    second = ApiKeyPool("test", [("b", 1.0), ("c", 1.0)])
+    first.report_failure("b", 403)
+    assert second.acquire() == "c"
+    assert ApiKeyPool("other", [("b", 1.0)]).acquire() == "b"
+
+
+def test_lease_releases_the_key():
+    pool = ApiKeyPool("test", [("a", 1.0)])
+    with pool.lease() as key:
+        assert key == "a"
+    states = alwrity_yt_blog._api_key_registry()["keys"]
+    assert states[("test", _key_fingerprint("a"))]["in_flight"] == 0
+
+
+def test_idle_key_state_is_forgotten(clock):
+    pool = ApiKeyPool("test", [("a", 1.0)])
+    pool.report_failure("a", 500)
+    with pool.lease():
+        pass
+    clock.now += alwrity_yt_blog.KEY_STATE_IDLE_TTL + 1
+    ApiKeyPool("test", [("b", 1.0)]).acquire()
+    assert ("test", _key_fingerprint("a")) not in alwrity_yt_blog._api_key_registry()["keys"]
+
+
+def test_transcription_prefers_the_uploading_key(monkeypatch):
+    used = []
+    monkeypatch.setattr(alwrity_yt_blog, "audio_cache_upload_fingerprints",
+                        lambda video_id: {_key_fingerprint("b")})
+    monkeypatch.setattr(alwrity_yt_blog, "get_youtube_transcript",
+                        lambda yt_url, key, key_pool=None: used.append(key) or "word " * 60)
+    pool = ApiKeyPool("test", [("a", 1.0), ("b", 1.0)])
+    pool.acquire(prefer=["b"])  # "b" is busier, but holds the upload URL
+    assert _transcribe_with_pool("https://www.youtube.com/watch?v=dQw4w9WgXcQ", pool)
+    assert used == ["b"]
@@ -0,0 +1,117 @@
+"""Focused checks for the local audio cache, using a temporary cache directory."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import alwrity_yt_blog
+from alwrity_yt_blog import (
+    _key_fingerprint,
+    audio_cache_find_upload,
+    audio_cache_lookup,
+    audio_cache_release,
+    audio_cache_set_upload,
+    audio_cache_store,
+    audio_cache_upload_fingerprints,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(alwrity_yt_blog, "AUDIO_CACHE_DIR", str(cache))
+    monkeypatch.setattr(alwrity_yt_blog, "AUDIO_CACHE_MAX_BYTES", 250)
+    alwrity_yt_blog._audio_cache_registry.clear()
+    yield cache
+    alwrity_yt_blog._audio_cache_registry.clear()
+
+
+def download(tmp_path, name, size=100):
+    path = tmp_path / f"{name}.webm"
+    path.write_bytes(b"a" * size)
+    return str(path)
+
+
+def store(tmp_path, video_id, last_used, size=100):
+    """Store an entry, release it and backdate its last use."""
+    meta = audio_cache_store(video_id, 140, download(tmp_path, video_id, size))
+    audio_cache_release(meta)
+    meta_path = alwrity_yt_blog._audio_cache_meta_path(video_id, 140)
+    os.utime(meta_path, (last_used, last_used))
+    return meta
+
+
+def test_lookup_returns_stored_entry(tmp_path):
+    src = download(tmp_path, "vid1")
+    meta = audio_cache_store("vid1", 140, src, title="Talk", length=60)
+    audio_cache_release(meta)
+    assert not os.path.exists(src)
+    found = audio_cache_lookup("vid1", 140)
+    assert found["title"] == "Talk"
+    assert open(found["audio_path"], "rb").read() == b"a" * 100
+    audio_cache_release(found)
+    assert audio_cache_lookup("vid1", 251) is None
+
+
+def test_store_of_cached_stream_keeps_existing_entry(tmp_path):
+    store(tmp_path, "vid1", time.time())
+    src = download(tmp_path, "again")
+    meta = audio_cache_store("vid1", 140, src)
+    audio_cache_release(meta)
+    assert os.path.exists(src)
+    assert meta["audio_file"] == "vid1_140.webm"
+
+
+def test_evicts_least_recently_used(tmp_path, cache_dir):
+    now = time.time()
+    store(tmp_path, "old", now - 30)
+    store(tmp_path, "newer", now - 20)
+    audio_cache_release(audio_cache_lookup("old", 140))  # Touch makes "newer" the LRU entry
+    store(tmp_path, "third", now)
+    assert sorted(os.listdir(cache_dir)) == [
+        "old_140.json", "old_140.webm", "third_140.json", "third_140.webm",
+    ]
+
+
+def test_eviction_skips_entries_in_use(tmp_path, cache_dir):
+    now = time.time()
+    store(tmp_path, "old", now - 30)
+    store(tmp_path, "newer", now - 20)
+    held = audio_cache_lookup("old", 140)
+    os.utime(alwrity_yt_blog._audio_cache_meta_path("old", 140), (now - 30, now - 30))
+    store(tmp_path, "third", now)
+    assert os.path.exists(held["audio_path"])
+    assert not os.path.exists(os.path.join(cache_dir, "newer_140.webm"))
+    audio_cache_release(held)
+    store(tmp_path, "fourth", now)
+    assert not os.path.exists(held["audio_path"])
+
+
+def test_file_larger_than_cache_is_not_stored(tmp_path, cache_dir):
+    src = download(tmp_path, "huge", size=300)
+    assert audio_cache_store("huge", 140, src) is None
+    assert os.path.exists(src)
+
+
+def test_upload_url_is_reused_only_by_its_key(tmp_path, monkeypatch):
+    meta = store(tmp_path, "vid1", time.time())
+    audio_cache_set_upload(meta, "https://cdn.example.test/upload/1", "key-one")
+    found = audio_cache_find_upload("vid1", "key-one")
+    assert found["upload_url"] == "https://cdn.example.test/upload/1"
+    audio_cache_release(found)
+    assert audio_cache_find_upload("vid1", "key-two") is None
+    assert audio_cache_upload_fingerprints("vid1") == {_key_fingerprint("key-one")}
+
+    monkeypatch.setattr(alwrity_yt_blog, "UPLOAD_URL_TTL", -1)
+    assert audio_cache_find_upload("vid1", "key-one") is None
+    assert audio_cache_upload_fingerprints("vid1") == set()
+
+
+def test_forgetting_upload_url(tmp_path):
+    meta = store(tmp_path, "vid1", time.time())
+    audio_cache_set_upload(meta, "https://cdn.example.test/upload/1", "key-one")
+    audio_cache_set_upload(meta, None, "key-one")
+    assert audio_cache_find_upload("vid1", "key-one") is None
@@ -0,0 +1,72 @@
+"""Focused checks for compact_transcript, which rewrites transcripts by default."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alwrity_yt_blog import compact_transcript
+
+
+def compact(text):
+    return compact_transcript(text)[0]
+
+
+def test_removes_fillers_and_stutters():
+    assert compact("Um, so I I think we should, you know, start.") == "So I think we should start."
+
+
+def test_collapses_repeated_phrases():
+    assert compact("We moved in the in the spring.") == "We moved in the spring."
+
+
+def test_keeps_sentence_boundary_after_trailing_filler():
+    assert compact("So the plan works, um. Next we deploy it.") == "So the plan works. Next we deploy it."
+
+
+def test_drops_filler_only_sentences():
+    assert compact("That went well. Uh. Let's continue.") == "That went well. Let's continue."
+
+
+def test_keeps_negated_sentence():
+    text = "I think this is a good idea. I think this is not a good idea."
+    assert compact(text) == text
+
+
+def test_keeps_contracted_negation():
+    text = "We should ship this on Friday. We shouldn't ship this on Friday."
+    assert compact(text) == text
+
+
+def test_keeps_reordered_sentence_with_same_words():
+    text = "The dog chased the cat around the yard. The cat chased the dog around the yard."
+    assert compact(text) == text
+
+
+def test_drops_exact_and_near_duplicate_sentences():
+    text = "Caching cuts the cost of every request. Caching cuts the cost of every request. " \
+           "Caching cuts the cost of every request today."
+    assert compact(text) == "Caching cuts the cost of every request."
+
+
+def test_keeps_meaningful_repeats():
+    for text in ["It was very very cold.", "No no no, that is wrong.", "Bye bye, everyone.",
+                 "I know that that is true.", "He had had enough."]:
+        assert compact(text) == text
+
+
+def test_keeps_numbers_names_and_comma_separated_repeats():
+    for text in ["We went to Bora Bora.", "It's a 50 50 chance.", "New York, New York is a song.",
+                 "I know, I know.", "They sang New York New York all night."]:
+        assert compact(text) == text
+
+
+def test_recapitalizes_only_after_a_leading_filler():
+    assert compact("Meet me at 3 p.m. today. Uh, like, so we agreed.") == "Meet me at 3 p.m. today. So we agreed."
+    assert compact("You know, i think so.") == "I think so."
+
+
+def test_reports_reduction():
+    text, stats = compact_transcript("Um, um, this is, uh, short.")
+    assert stats["original_chars"] == len("Um, um, this is, uh, short.")
+    assert stats["compacted_chars"] == len(text) < stats["original_chars"]
+    assert stats["compacted_tokens"] <= stats["original_tokens"]
@@ -0,0 +1,135 @@
+"""Focused checks for the generation cache, with Gemini replaced by a stub."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import alwrity_yt_blog
+from alwrity_yt_blog import (
+    GEMINI_FALLBACK_MODEL_NAME,
+    GEMINI_GENERATION_CONFIG,
+    GEMINI_MODEL_NAME,
+    _generate_blog_cached,
+    build_blog_variants,
+    generation_cache_get,
+    generation_cache_key,
+    generation_cache_put,
+    summarize_youtube_video,
+)
+
+TEMPLATE = "Write a blog about: {transcript}"
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "generations"
+    monkeypatch.setattr(alwrity_yt_blog, "GENERATION_CACHE_DIR", str(cache))
+    monkeypatch.setattr(alwrity_yt_blog, "GENERATION_CACHE_TTL", 100)
+    monkeypatch.setattr(alwrity_yt_blog, "GENERATION_CACHE_MAX_ENTRIES", 2)
+    return cache
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Replace Gemini with a stub that records prompts and answers with a numbered blog."""
+    calls = []
+
+    def fake_generate(prompt, gemini_pool, notify=None):
+        calls.append(prompt)
+        return f"blog {len(calls)}", gemini.model_name
+
+    gemini.model_name = GEMINI_MODEL_NAME
+    gemini.calls = calls
+    monkeypatch.setattr(alwrity_yt_blog, "_generate_with_gemini", fake_generate)
+    return gemini
+
+
+def key(transcript="talk", template=TEMPLATE, model=GEMINI_MODEL_NAME, config=GEMINI_GENERATION_CONFIG):
+    return generation_cache_key(transcript, template, model, config)
+
+
+def backdate(cache_dir, cache_key, seconds):
+    path = os.path.join(cache_dir, f"{cache_key}.json")
+    os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+def test_key_covers_every_input():
+    keys = {key(), key(transcript="other"), key(template="Summarize: {transcript}"),
+            key(model=GEMINI_FALLBACK_MODEL_NAME), key(config={**GEMINI_GENERATION_CONFIG, "temperature": 0})}
+    assert len(keys) == 5
+
+
+def test_round_trip_and_miss():
+    generation_cache_put(key(), "cached blog")
+    assert generation_cache_get(key()) == "cached blog"
+    assert generation_cache_get(key(transcript="other")) is None
+
+
+def test_expired_entries_are_ignored_and_evicted(cache_dir, monkeypatch):
+    generation_cache_put(key("old"), "old blog")
+    backdate(cache_dir, key("old"), 101)
+    later = time.time() + 101
+    monkeypatch.setattr(alwrity_yt_blog.time, "time", lambda: later)
+    assert generation_cache_get(key("old")) is None
+    generation_cache_put(key("new"), "new blog")
+    assert not os.path.exists(os.path.join(cache_dir, f"{key('old')}.json"))
+
+
+def test_least_recently_used_entries_are_evicted(cache_dir):
+    generation_cache_put(key("first"), "first blog")
+    generation_cache_put(key("second"), "second blog")
+    backdate(cache_dir, key("first"), 20)
+    backdate(cache_dir, key("second"), 10)
+    assert generation_cache_get(key("first")) == "first blog"  # Touch makes "second" the LRU entry
+    generation_cache_put(key("third"), "third blog")
+    assert generation_cache_get(key("second")) is None
+    assert generation_cache_get(key("first")) == "first blog"
+    assert generation_cache_get(key("third")) == "third blog"
+
+
+def test_generates_once_then_serves_from_cache(gemini):
+    assert _generate_blog_cached("talk", TEMPLATE, None) == ("blog 1", False)
+    assert _generate_blog_cached("talk", TEMPLATE, None) == ("blog 1", True)
+    assert gemini.calls == ["Write a blog about: talk"]
+
+
+def test_regenerate_bypasses_and_replaces_cache(gemini):
+    _generate_blog_cached("talk", TEMPLATE, None)
+    assert _generate_blog_cached("talk", TEMPLATE, None, regenerate=True) == ("blog 2", False)
+    assert _generate_blog_cached("talk", TEMPLATE, None) == ("blog 2", True)
+
+
+def test_fallback_result_is_cached_under_fallback_model(gemini):
+    gemini.model_name = GEMINI_FALLBACK_MODEL_NAME
+    _generate_blog_cached("talk", TEMPLATE, None)
+    assert generation_cache_get(key(model=GEMINI_FALLBACK_MODEL_NAME)) == "blog 1"
+    assert generation_cache_get(key()) is None
+
+
+def test_failed_cache_write_keeps_the_blog(gemini, monkeypatch):
+    def broken_put(cache_key, text):
+        raise OSError("disk full")
+    monkeypatch.setattr(alwrity_yt_blog, "generation_cache_put", broken_put)
+    assert _generate_blog_cached("talk", TEMPLATE, None) == ("blog 1", False)
+
+
+def test_summarize_uses_the_cache(gemini):
+    pool = ["gemini-key"]
+    first = summarize_youtube_video("talk", pool, compact=False)
+    assert summarize_youtube_video("talk", pool, compact=False) == first == "blog 1"
+    assert summarize_youtube_video("talk", pool, compact=False, regenerate=True) == "blog 2"
+    assert len(gemini.calls) == 2
+
+
+def test_summarize_applies_a_single_variant(gemini):
+    variants = build_blog_variants(["Short (~500 words)"], [], ["Spanish"])
+    assert len(variants) == 1
+    summarize_youtube_video("talk", ["gemini-key"], compact=False, instructions=variants[0]["instructions"])
+    assert "Write the entire article in Spanish" in gemini.calls[0]
+    assert "500 words" in gemini.calls[0]
+    summarize_youtube_video("talk", ["gemini-key"], compact=False)
+    assert len(gemini.calls) == 2  # The default prompt is cached separately
+    assert "Spanish" not in gemini.calls[1]
@@ -0,0 +1,84 @@
+"""Focused checks for per-job workspaces and their disk reservations."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import alwrity_yt_blog
+from alwrity_yt_blog import (
+    _move_audio_to_cache,
+    audio_cache_release,
+    job_workspace,
+    release_workspace_space,
+    reserve_workspace_space,
+)
+
+
+@pytest.fixture(autouse=True)
+def workspace_root(tmp_path, monkeypatch):
+    root = tmp_path / "jobs"
+    monkeypatch.setattr(alwrity_yt_blog, "WORKSPACE_ROOT", str(root))
+    monkeypatch.setattr(alwrity_yt_blog, "WORKSPACE_BUDGET_BYTES", 1000)
+    monkeypatch.setattr(alwrity_yt_blog, "AUDIO_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(alwrity_yt_blog, "AUDIO_CACHE_MAX_BYTES", 500)
+    alwrity_yt_blog._workspace_registry.clear()
+    alwrity_yt_blog._audio_cache_registry.clear()
+    yield root
+    alwrity_yt_blog._workspace_registry.clear()
+    alwrity_yt_blog._audio_cache_registry.clear()
+
+
+def test_workspaces_are_unique_and_removed(workspace_root):
+    with job_workspace() as first, job_workspace() as second:
+        assert first != second
+        assert os.path.dirname(first) == str(workspace_root)
+        open(os.path.join(first, "audio.webm"), "wb").close()
+    assert not os.path.exists(first)
+    assert not os.path.exists(second)
+
+
+def test_workspace_is_removed_on_error():
+    with pytest.raises(RuntimeError):
+        with job_workspace() as workspace:
+            raise RuntimeError("job failed")
+    assert not os.path.exists(workspace)
+    assert reserve_workspace_space("other", 1000)
+
+
+def test_reservations_share_the_budget():
+    with job_workspace() as first, job_workspace() as second:
+        assert reserve_workspace_space(first, 600)
+        assert not reserve_workspace_space(second, 600)
+        assert reserve_workspace_space(second, 400)
+        release_workspace_space(first)
+        assert reserve_workspace_space(second, 600)
+    with job_workspace() as third:
+        assert reserve_workspace_space(third, 1000)
+
+
+def audio_in(workspace, size):
+    path = os.path.join(workspace, "vid1_140.webm")
+    with open(path, "wb") as f:
+        f.write(b"a" * size)
+    return {"video_id": "vid1", "itag": 140, "title": "", "length": 0,
+            "audio_path": path, "uncached": True}
+
+
+def test_moving_audio_to_cache_frees_the_reservation():
+    with job_workspace() as workspace:
+        assert reserve_workspace_space(workspace, 1000)
+        cached = _move_audio_to_cache(audio_in(workspace, 100), workspace)
+        assert "uncached" not in cached
+        assert reserve_workspace_space("other", 1000)
+        audio_cache_release(cached)
+
+
+def test_uncacheable_audio_keeps_the_reservation():
+    with job_workspace() as workspace:
+        assert reserve_workspace_space(workspace, 1000)
+        audio = audio_in(workspace, 600)
+        assert _move_audio_to_cache(audio, workspace) is audio
+        assert os.path.exists(audio["audio_path"])
+        assert not reserve_workspace_space("other", 1)
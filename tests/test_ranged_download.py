@@ -0,0 +1,77 @@
+"""Focused checks for _fetch_byte_range, using a fake server instead of the network."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import alwrity_yt_blog
+from alwrity_yt_blog import _fetch_byte_range
+
+STREAM = bytes(range(256)) * 4
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        # Small chunks, so a bad body would be partly written before any overrun check
+        for i in range(0, len(self.body), 64):
+            yield self.body[i:i + 64]
+
+
+def serve(monkeypatch, ignore_range=False):
+    def fake_get(url, **kwargs):
+        start, end = map(int, url.rsplit("&range=", 1)[1].split("-"))
+        if ignore_range:
+            return FakeResponse(200, STREAM)
+        return FakeResponse(206, STREAM[start:end + 1])
+    monkeypatch.setattr(alwrity_yt_blog.requests, "get", fake_get)
+    monkeypatch.setattr(alwrity_yt_blog.time, "sleep", lambda seconds: None)
+
+
+def blank_file(tmp_path):
+    path = tmp_path / "audio.webm"
+    path.write_bytes(b"\0" * len(STREAM))
+    return path
+
+
+def test_writes_range_at_its_offset(tmp_path, monkeypatch):
+    serve(monkeypatch)
+    path = blank_file(tmp_path)
+    _fetch_byte_range("https://example.test/v?x=1", 100, 299, path, len(STREAM))
+    data = path.read_bytes()
+    assert data[100:300] == STREAM[100:300]
+    assert data[:100] == b"\0" * 100
+
+
+def test_accepts_full_body_for_whole_stream(tmp_path, monkeypatch):
+    serve(monkeypatch, ignore_range=True)
+    path = blank_file(tmp_path)
+    _fetch_byte_range("https://example.test/v?x=1", 0, len(STREAM) - 1, path, len(STREAM))
+    assert path.read_bytes() == STREAM
+
+
+def test_rejects_full_body_for_partial_range(tmp_path, monkeypatch):
+    serve(monkeypatch, ignore_range=True)
+    path = blank_file(tmp_path)
+    with pytest.raises(IOError):
+        _fetch_byte_range("https://example.test/v?x=1", 100, 299, path, len(STREAM), max_retries=1)
+    assert path.read_bytes() == b"\0" * len(STREAM)
+
+
+def test_rejects_full_body_for_first_range_of_larger_stream(tmp_path, monkeypatch):
+    serve(monkeypatch, ignore_range=True)
+    path = blank_file(tmp_path)
+    with pytest.raises(IOError):
+        _fetch_byte_range("https://example.test/v?x=1", 0, 99, path, len(STREAM), max_retries=0)
+    assert path.read_bytes() == b"\0" * len(STREAM)